@@ -1,9 +1,21 @@
 import os
+import asyncio
+import glob
+import hashlib
+import io
+import math
+import subprocess
+import time
+import functools
+import inspect
+import json
+import threading
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
 import google.generativeai as genai
-from openai import OpenAI
-from pydub import AudioSegment
+from openai import AsyncOpenAI
 import tempfile
-from typing import List
+from typing import AsyncIterator, Callable, Dict, List, Optional, Tuple
 import logging
 from datetime import datetime
 import streamlit as st
@@ -52,119 +64,550 @@ def initialize_ai():
     openai_key = get_api_key('OPENAI_API_KEY')
     
     genai.configure(api_key=gemini_key)
-    return OpenAI(api_key=openai_key)
+    return openai_key
 
-# Global OpenAI client
-openai_client = initialize_ai()
+# OpenAI API key, used to create async clients
+openai_api_key = initialize_ai()
+
+def get_async_openai_client() -> AsyncOpenAI:
+    """Create an async OpenAI client.
+
+    An async client's connection pool is bound to the event loop it is used on,
+    and Streamlit runs every streamed response on a fresh loop, so a client is
+    created per request instead of being shared globally.
+    """
+    return AsyncOpenAI(api_key=openai_api_key)
+
+# Gemini model shared by all chunk transcriptions, created on first use
+_gemini_model = None
+
+def get_gemini_model() -> genai.GenerativeModel:
+    global _gemini_model
+    if _gemini_model is None:
+        _gemini_model = genai.GenerativeModel(model_name="gemini-1.5-flash")
+    return _gemini_model
+
+# Worker threads for the blocking SDK calls, shared across asyncio.run() invocations
+# and across all Streamlit sessions in this process
+_executor = None
+_executor_lock = threading.Lock()
+
+def get_executor() -> ThreadPoolExecutor:
+    global _executor
+    # Sessions run on separate threads, so guard creation to build exactly one pool
+    with _executor_lock:
+        if _executor is None:
+            # Sized for a single transcription run: one thread per upload and generate
+            # slot. Concurrent runs from other sessions share the pool and queue for threads.
+            max_workers = AudioTranscriber.UPLOAD_WORKERS + AudioTranscriber.GENERATE_WORKERS
+            _executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="lecture-summarizer")
+        return _executor
+
+async def run_blocking(func: Callable, *args):
+    """Run a blocking call on the shared executor without blocking the event loop."""
+    return await asyncio.get_running_loop().run_in_executor(get_executor(), functools.partial(func, *args))
+
+# On-disk cache for transcripts and summaries, keyed by content hash
+CACHE_DIR = os.path.join(os.path.expanduser("~"), ".cache", "lecture-summarizer")
+CACHE_TTL = 7 * 24 * 60 * 60  # 1 week in seconds
+
+def bytes_sha256(data: bytes) -> str:
+    """Return the SHA-256 hex digest of raw bytes."""
+    return hashlib.sha256(data).hexdigest()
+
+def text_sha256(text: str) -> str:
+    """Return the SHA-256 hex digest of a string."""
+    return bytes_sha256(text.encode('utf-8'))
+
+def _read_cache(key: str) -> Optional[str]:
+    path = os.path.join(CACHE_DIR, f"{key}.txt")
+    try:
+        if time.time() - os.path.getmtime(path) > CACHE_TTL:
+            return None
+        with open(path, encoding='utf-8') as f:
+            return f.read()
+    except OSError:
+        return None
+
+def _write_cache(key: str, value: str) -> None:
+    try:
+        os.makedirs(CACHE_DIR, exist_ok=True)
+        path = os.path.join(CACHE_DIR, f"{key}.txt")
+        # Write to a temporary file first so readers never see a partial entry
+        with tempfile.NamedTemporaryFile('w', encoding='utf-8', dir=CACHE_DIR, delete=False) as f:
+            f.write(value)
+        os.replace(f.name, path)
+    except OSError as e:
+        logger.warning(f"Could not write cache entry {key}: {str(e)}")
+
+# Results of fully processed uploads, stored as one JSON cache entry per file hash
+def load_processed_file(file_hash: str) -> Optional[dict]:
+    """Return the stored results for a previously processed upload, if any."""
+    cached = _read_cache(f"processed-{file_hash}")
+    if cached is None:
+        return None
+    try:
+        return json.loads(cached)
+    except ValueError:
+        return None
+
+def save_processed_file(file_hash: str, **results) -> None:
+    """Merge results for an upload into its stored entry."""
+    entry = load_processed_file(file_hash) or {}
+    entry.update(results)
+    _write_cache(f"processed-{file_hash}", json.dumps(entry))
+
+def disk_cache(key_func: Callable[..., str]):
+    """Cache an async function's text result on disk under the key returned by key_func.
+
+    Async generators are cached as the concatenation of their yielded text; on a
+    cache hit the whole text is yielded at once.
+    """
+    def decorator(func):
+        if inspect.isasyncgenfunction(func):
+            @functools.wraps(func)
+            async def async_gen_wrapper(*args, **kwargs):
+                key = key_func(*args, **kwargs)
+                cached = _read_cache(key)
+                if cached is not None:
+                    logger.debug("Cache hit for %s: %s", func.__name__, key)
+                    yield cached
+                    return
+                parts = []
+                async for part in func(*args, **kwargs):
+                    parts.append(part)
+                    yield part
+                _write_cache(key, "".join(parts))
+            return async_gen_wrapper
+
+        if asyncio.iscoroutinefunction(func):
+            @functools.wraps(func)
+            async def async_wrapper(*args, **kwargs):
+                key = key_func(*args, **kwargs)
+                cached = _read_cache(key)
+                if cached is not None:
+                    logger.debug("Cache hit for %s: %s", func.__name__, key)
+                    return cached
+                result = await func(*args, **kwargs)
+                _write_cache(key, result)
+                return result
+            return async_wrapper
+
+        raise TypeError(f"disk_cache only supports coroutine and async generator functions, got {func!r}")
+    return decorator
 
 class AudioTranscriber:
-    CHUNK_DURATION = 10 * 60 * 1000  # 10 minutes in milliseconds
+    CHUNK_DURATION = 10 * 60  # 10 minutes in seconds
+    CHUNK_SAMPLE_RATE = 16000  # 16 kHz mono is all speech transcription needs
+    CHUNK_BITRATE = "24k"  # Opus bitrate for 16 kHz mono speech
+    CHUNK_MIME_TYPE = "audio/ogg"
+    UPLOAD_WORKERS = 4  # Concurrent Gemini uploads
+    GENERATE_WORKERS = 4  # Concurrent Gemini transcription requests, kept low to respect rate limits
     
     @staticmethod
-    def convert_to_wav(audio_file) -> str:
-        """Convert uploaded audio to WAV format."""
-        logger.info("Starting audio conversion to WAV format")
+    def get_duration(audio_path: str) -> Optional[float]:
+        """Return the audio duration in seconds using ffprobe, without decoding it.
+
+        Returns None when the duration is unavailable, e.g. streamed WebM
+        containers report "N/A", or when ffprobe itself fails.
+        """
         try:
-            with tempfile.NamedTemporaryFile(suffix='.wav', delete=False) as temp_wav:
-                audio = AudioSegment.from_file(audio_file)
-                audio.export(temp_wav.name, format='wav')
-                logger.info(f"Audio successfully converted to WAV format: {temp_wav.name}")
-                return temp_wav.name
-        except Exception as e:
-            logger.error(f"Error converting audio to WAV: {str(e)}")
-            raise
+            output = subprocess.check_output([
+                "ffprobe", "-v", "error",
+                "-show_entries", "format=duration",
+                "-of", "default=noprint_wrappers=1:nokey=1",
+                audio_path,
+            ])
+            duration = float(output)
+        except (OSError, subprocess.CalledProcessError, ValueError) as e:
+            logger.debug("Could not determine audio duration: %s", e)
+            return None
+        return duration if math.isfinite(duration) and duration > 0 else None
 
     @staticmethod
-    def chunk_audio(wav_path: str) -> List[str]:
-        """Split audio into 5-minute chunks."""
+    def chunk_audio(audio_path: str, output_dir: str, file_hash: str) -> List[str]:
+        """Convert and split audio into 10-minute 16 kHz mono Opus chunks inside output_dir.
+
+        A single ffmpeg pass decodes the upload, encodes it to Opus and writes
+        the segments directly, so no intermediate WAV is ever produced. Chunks
+        are named {file_hash}_chunk_NNN.ogg, so the same upload always produces
+        the same chunk names.
+        """
         logger.info("Starting audio chunking process")
         try:
-            audio = AudioSegment.from_wav(wav_path)
-            total_duration_minutes = len(audio) / (60 * 1000)  # Convert to minutes
-            chunks = []
-            
-            logger.info(f"Total audio duration: {total_duration_minutes:.2f} minutes")
-            expected_chunks = (len(audio) + AudioTranscriber.CHUNK_DURATION - 1) // AudioTranscriber.CHUNK_DURATION
-            logger.info(f"Splitting audio into {expected_chunks} chunks")
+            # The duration only feeds these log lines; ffmpeg segments the file either way
+            duration = AudioTranscriber.get_duration(audio_path)
+            if duration is not None:
+                logger.info(f"Total audio duration: {duration / 60:.2f} minutes")
+                expected_chunks = math.ceil(duration / AudioTranscriber.CHUNK_DURATION)
+                logger.info(f"Splitting audio into {expected_chunks} chunks")
             
-            for i in range(0, len(audio), AudioTranscriber.CHUNK_DURATION):
-                chunk = audio[i:i + AudioTranscriber.CHUNK_DURATION]
-                with tempfile.NamedTemporaryFile(suffix='.wav', delete=False) as temp_chunk:
-                    chunk.export(temp_chunk.name, format='wav')
-                    chunks.append(temp_chunk.name)
-                    chunk_duration = len(chunk) / (60 * 1000)  # Convert to minutes
-                    logger.info(f"Chunk {len(chunks)} created: {chunk_duration:.2f} minutes")
+            subprocess.run(
+                [
+                    "ffmpeg", "-y", "-loglevel", "error",
+                    "-i", audio_path,
+                    "-vn",
+                    "-ar", str(AudioTranscriber.CHUNK_SAMPLE_RATE),
+                    "-ac", "1",
+                    "-c:a", "libopus",
+                    "-b:a", AudioTranscriber.CHUNK_BITRATE,
+                    # Bit-exact output keeps chunk bytes (and their cache keys) stable across runs
+                    "-fflags", "+bitexact",
+                    "-flags:a", "+bitexact",
+                    "-f", "segment",
+                    "-segment_time", str(AudioTranscriber.CHUNK_DURATION),
+                    "-reset_timestamps", "1",
+                    os.path.join(output_dir, f"{file_hash}_chunk_%03d.ogg"),
+                ],
+                check=True,
+                capture_output=True,
+            )
+            chunks = sorted(glob.glob(os.path.join(output_dir, f"{file_hash}_chunk_*.ogg")))
             
             logger.info(f"Audio successfully split into {len(chunks)} chunks")
             return chunks
+        except subprocess.CalledProcessError as e:
+            logger.error(f"Error chunking audio: {e.stderr.decode(errors='replace')}")
+            raise
         except Exception as e:
             logger.error(f"Error chunking audio: {str(e)}")
             raise
 
     @staticmethod
-    def transcribe_chunk(chunk_path: str) -> str:
-        """Transcribe a single audio chunk using Gemini."""
-        chunk_number = chunk_path.split('/')[-1]  # Extract filename for logging
-        logger.info(f"Starting transcription of chunk: {chunk_number}")
+    async def transcribe_chunk(chunk_path: str, upload_slots: asyncio.Semaphore,
+                               generate_slots: asyncio.Semaphore,
+                               processed_chunks: Optional[Dict[str, str]] = None,
+                               uploaded_files: Optional[Dict[str, str]] = None) -> str:
+        """Transcribe a single audio chunk using Gemini.
+
+        processed_chunks maps chunk content hashes to finished transcripts; it is
+        checked before and updated after transcribing, so a rerun after a partial
+        failure only transcribes the chunks that are still missing. uploaded_files
+        maps chunk content hashes to Gemini file names, so retries reuse uploads.
+        """
+        # Read the chunk once; the same bytes are hashed for the cache and uploaded
+        with open(chunk_path, 'rb') as f:
+            audio_bytes = f.read()
+        chunk_hash = bytes_sha256(audio_bytes)
+        if processed_chunks is not None and chunk_hash in processed_chunks:
+            logger.debug("Reusing transcript of already processed chunk: %s", os.path.basename(chunk_path))
+            return processed_chunks[chunk_hash]
+        
+        transcription = await AudioTranscriber.transcribe_audio(
+            audio_bytes, chunk_hash, os.path.basename(chunk_path), upload_slots, generate_slots, uploaded_files
+        )
+        if processed_chunks is not None:
+            processed_chunks[chunk_hash] = transcription
+        return transcription
+
+    @staticmethod
+    @disk_cache(lambda audio_bytes, chunk_hash, *args, **kwargs: f"transcript-{chunk_hash}")
+    async def transcribe_audio(audio_bytes: bytes, chunk_hash: str, chunk_number: str, upload_slots: asyncio.Semaphore,
+                               generate_slots: asyncio.Semaphore,
+                               uploaded_files: Optional[Dict[str, str]] = None) -> str:
+        """Transcribe in-memory chunk audio using Gemini.
+
+        chunk_hash is the SHA-256 of audio_bytes, computed once by the caller.
+        Uploading and generating are bounded separately, so later chunks keep
+        uploading while earlier ones are still being transcribed.
+        """
+        logger.debug("Starting transcription of chunk: %s", chunk_number)
         try:
-            model = genai.GenerativeModel(model_name="gemini-1.5-flash")
-            uploaded_file = genai.upload_file(chunk_path)
-            logger.info(f"Successfully uploaded chunk {chunk_number} to Gemini")
+            model = get_gemini_model()
+            # The Gemini SDK is synchronous, so run the blocking calls in worker threads
+            async with upload_slots:
+                uploaded_file = await run_blocking(
+                    AudioTranscriber.upload_chunk, audio_bytes, chunk_hash, chunk_number, uploaded_files
+                )
             
-            response = model.generate_content([
-                "Provide a complete and detailed transcript of the audio without any summarization.",
-                uploaded_file
-            ])
+            async with generate_slots:
+                response = await run_blocking(model.generate_content, [
+                    "Provide a complete and detailed transcript of the audio without any summarization.",
+                    uploaded_file
+                ])
             
-            logger.info(f"Successfully transcribed chunk: {chunk_number}")
+            logger.debug("Successfully transcribed chunk: %s", chunk_number)
             return response.text
         except Exception as e:
             logger.error(f"Error transcribing chunk {chunk_number}: {str(e)}")
             raise
 
+    @staticmethod
+    def upload_chunk(audio_bytes: bytes, chunk_hash: str, chunk_number: str,
+                     uploaded_files: Optional[Dict[str, str]] = None):
+        """Upload chunk audio to Gemini, reusing a previous upload of the same bytes if it still exists."""
+        if uploaded_files and chunk_hash in uploaded_files:
+            try:
+                uploaded_file = genai.get_file(uploaded_files[chunk_hash])
+                logger.debug("Reusing uploaded Gemini file for chunk %s", chunk_number)
+                return uploaded_file
+            except Exception as e:
+                logger.debug("Previous upload of chunk %s is no longer available: %s", chunk_number, e)
+        
+        uploaded_file = genai.upload_file(
+            io.BytesIO(audio_bytes),
+            mime_type=AudioTranscriber.CHUNK_MIME_TYPE,
+            display_name=chunk_number,
+        )
+        if uploaded_files is not None:
+            uploaded_files[chunk_hash] = uploaded_file.name
+        logger.debug("Successfully uploaded chunk %s to Gemini", chunk_number)
+        return uploaded_file
+
+    @staticmethod
+    def delete_uploaded_files(uploaded_files: Dict[str, str]) -> None:
+        """Delete the Gemini files in uploaded_files and clear the registry."""
+        def delete(name: str) -> None:
+            try:
+                genai.delete_file(name)
+            except Exception as e:
+                logger.warning(f"Could not delete uploaded Gemini file {name}: {str(e)}")
+
+        list(get_executor().map(delete, list(uploaded_files.values())))
+        logger.info(f"Deleted {len(uploaded_files)} uploaded Gemini files")
+        uploaded_files.clear()
+
+    @staticmethod
+    def transcribe_chunks(chunks: List[str], on_progress: Optional[Callable[[int, int], None]] = None,
+                          processed_chunks: Optional[Dict[str, str]] = None,
+                          uploaded_files: Optional[Dict[str, str]] = None) -> List[str]:
+        """Transcribe all chunks concurrently, returning transcripts in chunk order."""
+        async def run_all() -> List[str]:
+            upload_slots = asyncio.Semaphore(AudioTranscriber.UPLOAD_WORKERS)
+            generate_slots = asyncio.Semaphore(AudioTranscriber.GENERATE_WORKERS)
+            completed = 0
+
+            async def transcribe(chunk_number: int, chunk_path: str) -> str:
+                nonlocal completed
+                start = time.perf_counter()
+                transcription = await AudioTranscriber.transcribe_chunk(
+                    chunk_path, upload_slots, generate_slots, processed_chunks, uploaded_files
+                )
+                size_kb = os.path.getsize(chunk_path) / 1024
+                # The chunk file is no longer needed once its transcript exists
+                os.unlink(chunk_path)
+                completed += 1
+                # One summary line per chunk; the per-step details are logged at DEBUG
+                logger.info("chunk %d/%d done in %.2fs (%.1f KB, %d chars)", chunk_number, len(chunks),
+                            time.perf_counter() - start, size_kb, len(transcription))
+                if on_progress:
+                    on_progress(completed, len(chunks))
+                return transcription
+
+            # gather preserves the order of the chunks regardless of completion order
+            return await asyncio.gather(*[transcribe(i, chunk) for i, chunk in enumerate(chunks, 1)])
+
+        return asyncio.run(run_all())
+
 class ContentAnalyzer:
+    EMBEDDING_MODEL = "text-embedding-3-small"
+    SIMILARITY_THRESHOLD = 0.92  # Cosine similarity above which a cached answer is reused
+    HISTORY_WINDOW = 10  # Recent messages sent verbatim; older turns are folded into a summary
+    HISTORY_CHAR_BUDGET = 4000  # Max characters of recent messages sent verbatim
+    HISTORY_KEEP = 4  # Messages kept verbatim after compacting, so compaction runs every few turns
+    HISTORY_MIN_BATCH = 4  # Fewest older messages worth a summary call (two exchanges)
+    PART_SUMMARY_WORKERS = 4  # Concurrent per-chunk summary requests
+
     def __init__(self):
         self.conversation_history = []
+        self.history_summary = ""
+        # Answered questions per transcription hash: (normalized question embedding, answer)
+        self.qa_cache: Dict[str, List[Tuple[np.ndarray, str]]] = {}
+        # Chat system message per transcription hash, built once and reused every turn
+        self._system_messages: Dict[str, dict] = {}
+        # Last transcription seen and its hash; holding the reference keeps its id() from being reused
+        self._hashed_transcription: Optional[Tuple[str, str]] = None
         logger.info("Content Analyzer initialized")
 
-    def generate_summary(self, transcription: str) -> str:
-        """Generate a detailed summary using GPT-4."""
-        logger.info("Starting summary generation")
+    def _transcription_key(self, transcription: str) -> str:
+        """Return the transcription's hash, computed once per transcription object.
+
+        The transcription lives in session state, so every chat turn passes the
+        same string object and the lecture-sized encode and hash are skipped.
+        """
+        if self._hashed_transcription is None or self._hashed_transcription[0] is not transcription:
+            self._hashed_transcription = (transcription, text_sha256(transcription))
+        return self._hashed_transcription[1]
+
+    def _system_message(self, transcription_key: str, transcription: str) -> dict:
+        """Return the chat system message embedding the transcription."""
+        if transcription_key not in self._system_messages:
+            self._system_messages[transcription_key] = {
+                "role": "system",
+                "content": f"You are a helpful assistant answering questions about this lecture. Here's the lecture transcription for context: {transcription}"
+            }
+        return self._system_messages[transcription_key]
+
+    async def _embed(self, client: AsyncOpenAI, text: str) -> np.ndarray:
+        """Embed text and normalize it so dot products are cosine similarities."""
+        response = await client.embeddings.create(model=self.EMBEDDING_MODEL, input=text)
+        embedding = np.array(response.data[0].embedding, dtype=np.float32)
+        return embedding / np.linalg.norm(embedding)
+
+    def _find_cached_answer(self, cache: List[Tuple[np.ndarray, str]], embedding: np.ndarray) -> Optional[str]:
+        """Return the answer to the most similar previous question, if it is close enough."""
+        if not cache:
+            return None
+        similarities = np.stack([cached for cached, _ in cache]) @ embedding
+        best = int(np.argmax(similarities))
+        if similarities[best] > self.SIMILARITY_THRESHOLD:
+            logger.info(f"Semantic cache hit (similarity {similarities[best]:.3f})")
+            return cache[best][1]
+        return None
+
+    async def _compact_history(self, client: AsyncOpenAI) -> None:
+        """Fold older turns into a rolling summary once HISTORY_WINDOW or HISTORY_CHAR_BUDGET is exceeded.
+
+        The latest exchange is always sent verbatim, so only the messages before
+        it count against the character budget. Compaction works in batches: the
+        history is cut down to HISTORY_KEEP messages and the earlier messages to
+        half the budget, and at least HISTORY_MIN_BATCH messages are folded per
+        call, so even with long answers the summary call runs at most every
+        other turn rather than after every answer.
+        """
+        def earlier_chars(messages: List[dict]) -> int:
+            return sum(len(m['content']) for m in messages[:-2])
+
+        if (len(self.conversation_history) <= self.HISTORY_WINDOW
+                and earlier_chars(self.conversation_history) <= self.HISTORY_CHAR_BUDGET):
+            return
+        keep = min(self.HISTORY_KEEP, len(self.conversation_history))
+        # Drop whole question/answer pairs until the messages before the latest
+        # exchange fit half the budget
+        while keep > 2 and earlier_chars(self.conversation_history[-keep:]) > self.HISTORY_CHAR_BUDGET // 2:
+            keep -= 2
+        if len(self.conversation_history) - keep < self.HISTORY_MIN_BATCH:
+            return
+        older_turns = self.conversation_history[:-keep]
+        
+        transcript = "\n".join(f"{m['role']}: {m['content']}" for m in older_turns)
         try:
-            response = openai_client.chat.completions.create(
-                model="gpt-4o",
+            response = await client.chat.completions.create(
+                model="gpt-4o-mini",
                 messages=[
-                    {"role": "system", "content": "You are an expert at creating detailed, intuitive summaries of academic lectures. Break down complex topics into clear explanations. "},
-                    {"role": "user", "content": f"Please provide a very detailed and a very intuitive engaging summary of this lecture transcription: {transcription}"}
+                    {"role": "system", "content": "Summarize this conversation about a lecture concisely, keeping the questions asked and the key facts from the answers."},
+                    {"role": "user", "content": f"Summary so far: {self.history_summary or 'None'}\n\nNew messages:\n{transcript}"}
                 ]
             )
+        except Exception as e:
+            # The answer has already been delivered; keep the full history and retry next turn
+            logger.warning(f"Could not compact chat history: {str(e)}")
+            return
+        
+        # Only drop the older turns once their summary exists
+        self.history_summary = response.choices[0].message.content
+        self.conversation_history = self.conversation_history[len(older_turns):]
+        logger.info(f"Compacted {len(older_turns)} older chat messages into the conversation summary")
+
+    # Cached per part, so a summary abandoned mid-stream (e.g. by a tab switch) resumes
+    # without redoing the map step; the position is part of the key since it is in the prompt
+    @disk_cache(lambda self, client, part_number, total_parts, transcription:
+                f"part-summary-{part_number}-of-{total_parts}-{text_sha256(transcription)}")
+    async def _summarize_part(self, client: AsyncOpenAI, part_number: int, total_parts: int, transcription: str) -> str:
+        """Summarize one chunk's transcription as part of a longer lecture."""
+        response = await client.chat.completions.create(
+            model="gpt-4o-mini",
+            messages=[
+                {"role": "system", "content": "You are an expert at summarizing academic lectures. Keep every concept, definition, example and formula that is discussed."},
+                {"role": "user", "content": f"This is part {part_number} of {total_parts} of a lecture transcription. Provide a detailed summary of this part: {transcription}"}
+            ]
+        )
+        logger.debug("Summarized lecture part %d/%d", part_number, total_parts)
+        return response.choices[0].message.content
+
+    async def _summarize_parts(self, client: AsyncOpenAI, transcriptions: List[str]) -> List[str]:
+        """Summarize every chunk's transcription concurrently, preserving order."""
+        slots = asyncio.Semaphore(self.PART_SUMMARY_WORKERS)
+
+        async def summarize(part_number: int, transcription: str) -> str:
+            async with slots:
+                return await self._summarize_part(client, part_number, len(transcriptions), transcription)
+
+        return await asyncio.gather(*[
+            summarize(i, transcription) for i, transcription in enumerate(transcriptions, 1)
+        ])
+
+    @staticmethod
+    async def _stream_text(stream) -> AsyncIterator[str]:
+        """Yield the text deltas of a streamed chat completion."""
+        async for chunk in stream:
+            if chunk.choices and chunk.choices[0].delta.content:
+                yield chunk.choices[0].delta.content
+
+    @disk_cache(lambda self, transcriptions: f"summary-{text_sha256(' '.join(transcriptions))}")
+    async def generate_summary(self, transcriptions: List[str]) -> AsyncIterator[str]:
+        """Stream a detailed summary using GPT-4.
+
+        Long lectures are summarized map-reduce style: each chunk is summarized
+        concurrently, then the part summaries are merged in one final call.
+        """
+        logger.info("Starting summary generation")
+        try:
+            async with get_async_openai_client() as client:
+                if len(transcriptions) > 1:
+                    part_summaries = await self._summarize_parts(client, transcriptions)
+                    parts = "\n\n".join(
+                        f"Part {i}:\n{summary}" for i, summary in enumerate(part_summaries, 1)
+                    )
+                    prompt = f"These are summaries of consecutive parts of one lecture. Merge them into a very detailed and a very intuitive engaging summary of the whole lecture: {parts}"
+                else:
+                    prompt = f"Please provide a very detailed and a very intuitive engaging summary of this lecture transcription: {' '.join(transcriptions)}"
+                
+                stream = await client.chat.completions.create(
+                    model="gpt-4o",
+                    messages=[
+                        {"role": "system", "content": "You are an expert at creating detailed, intuitive summaries of academic lectures. Break down complex topics into clear explanations. "},
+                        {"role": "user", "content": prompt}
+                    ],
+                    stream=True
+                )
+                async for text in self._stream_text(stream):
+                    yield text
             logger.info("Summary successfully generated")
-            return response.choices[0].message.content
         except Exception as e:
             logger.error(f"Error generating summary: {str(e)}")
             raise
 
-    def chat_with_context(self, transcription: str, user_question: str) -> str:
-        """Interactive QA with the transcription context."""
+    async def chat_with_context(self, transcription: str, user_question: str) -> AsyncIterator[str]:
+        """Interactive QA with the transcription context, streaming the answer."""
         logger.info(f"Processing user question: {user_question[:50]}...")
         try:
-            self.conversation_history.append({"role": "user", "content": user_question})
-            
-            messages = [
-                {"role": "system", "content": f"You are a helpful assistant answering questions about this lecture. Here's the lecture transcription for context: {transcription}"},
-                *self.conversation_history
-            ]
-            
-            response = openai_client.chat.completions.create(
-                model="gpt-4o-mini",
-                messages=messages
-            )
-            
-            assistant_response = response.choices[0].message.content
-            self.conversation_history.append({"role": "assistant", "content": assistant_response})
+            async with get_async_openai_client() as client:
+                self.conversation_history.append({"role": "user", "content": user_question})
+                
+                transcription_key = self._transcription_key(transcription)
+                cache = self.qa_cache.setdefault(transcription_key, [])
+                question_embedding = await self._embed(client, user_question)
+                cached_answer = self._find_cached_answer(cache, question_embedding)
+                if cached_answer is not None:
+                    self.conversation_history.append({"role": "assistant", "content": cached_answer})
+                    yield cached_answer
+                    await self._compact_history(client)
+                    return
+                
+                # The transcription stays the first message so the prompt prefix is identical
+                # across turns and can be served from OpenAI's prompt cache
+                messages = [self._system_message(transcription_key, transcription)]
+                if self.history_summary:
+                    messages.append({"role": "system", "content": f"Summary of the earlier conversation: {self.history_summary}"})
+                messages.extend(self.conversation_history)
+                
+                stream = await client.chat.completions.create(
+                    model="gpt-4o-mini",
+                    messages=messages,
+                    stream=True
+                )
+                parts = []
+                async for text in self._stream_text(stream):
+                    parts.append(text)
+                    yield text
+                
+                assistant_response = "".join(parts)
+                self.conversation_history.append({"role": "assistant", "content": assistant_response})
+                cache.append((question_embedding, assistant_response))
+                await self._compact_history(client)
             
             logger.info("Successfully generated response to user question")
-            return assistant_response
         except Exception as e:
             logger.error(f"Error in chat interaction: {str(e)}")
             raise
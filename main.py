@@ -1,7 +1,11 @@
 import streamlit as st
-from ai_logic import AudioTranscriber, ContentAnalyzer, get_api_key
+from ai_logic import (
+    AudioTranscriber, ContentAnalyzer, bytes_sha256, get_api_key,
+    load_processed_file, save_processed_file
+)
 import tempfile
 import os
+import shutil
 import logging
 
 # Configure logging with timestamp
@@ -71,14 +75,24 @@ if 'transcription' not in st.session_state:
     st.session_state.transcription = None
 if 'summary' not in st.session_state:
     st.session_state.summary = None
+if 'file_hash' not in st.session_state:
+    st.session_state.file_hash = None
+if 'chunk_transcriptions' not in st.session_state:
+    st.session_state.chunk_transcriptions = []
 if 'analyzer' not in st.session_state:
     st.session_state.analyzer = ContentAnalyzer()
+if 'processed_chunks' not in st.session_state:
+    st.session_state.processed_chunks = {}  # Chunk content hash -> transcript
+if 'uploaded_files' not in st.session_state:
+    st.session_state.uploaded_files = {}  # Chunk content hash -> Gemini file name
 if 'chat_history' not in st.session_state:
     st.session_state.chat_history = []
+if 'pending_question' not in st.session_state:
+    st.session_state.pending_question = None
 if 'active_tab' not in st.session_state:
     st.session_state.active_tab = "📝 Transcription"  # Default to Transcription tab
 
-def process_audio(audio_file):
+def process_audio(audio_file, file_hash):
     logger.info(f"Starting to process audio file: {audio_file.name}")
     logger.info(f"File size: {audio_file.size / (1024*1024):.2f} MB")
     
@@ -89,48 +103,43 @@ def process_audio(audio_file):
             tmp_file_path = tmp_file.name
             logger.info("Temporary file created successfully")
 
+        chunk_dir = tempfile.mkdtemp()
         try:
-            # Convert to WAV
-            logger.info("Starting WAV conversion")
-            wav_path = AudioTranscriber.convert_to_wav(tmp_file_path)
-            
-            # Chunk and transcribe
+            # Convert and chunk in a single ffmpeg pass, then transcribe
             logger.info("Starting audio chunking")
-            chunks = AudioTranscriber.chunk_audio(wav_path)
-            transcriptions = []
+            chunks = AudioTranscriber.chunk_audio(tmp_file_path, chunk_dir, file_hash)
             
             # Create a single progress bar
             progress_bar = st.progress(0)
             
+            def update_progress(done, total):
+                progress_bar.progress(done / total)  # Update the same progress bar
+            
             logger.info(f"Beginning transcription of {len(chunks)} chunks")
-            for i, chunk in enumerate(chunks, 1):
-                progress_bar.progress(i / len(chunks))  # Update the same progress bar
-                logger.info(f"Processing chunk {i}/{len(chunks)}")
-                transcription = AudioTranscriber.transcribe_chunk(chunk)
-                transcriptions.append(transcription)
-                logger.info(f"Chunk {i}/{len(chunks)} transcribed successfully")
+            transcriptions = AudioTranscriber.transcribe_chunks(
+                chunks,
+                on_progress=update_progress,
+                processed_chunks=st.session_state.processed_chunks,
+                uploaded_files=st.session_state.uploaded_files
+            )
+            
+            # Every chunk is transcribed, so the server-side uploads are no longer needed
+            AudioTranscriber.delete_uploaded_files(st.session_state.uploaded_files)
             
             # Clear the progress bar when done
             progress_bar.empty()
             
-            # Combine transcriptions
+            # Combine transcriptions; the summary is streamed when its tab is opened
             logger.info("Combining all transcriptions")
+            st.session_state.chunk_transcriptions = transcriptions
             st.session_state.transcription = " ".join(transcriptions)
-            
-            # Generate summary
-            logger.info("Starting summary generation")
-            st.session_state.summary = st.session_state.analyzer.generate_summary(
-                st.session_state.transcription
-            )
-            logger.info("Summary generated successfully")
+            save_processed_file(file_hash, chunk_transcriptions=transcriptions)
             
         finally:
             # Cleanup temporary files
             logger.info("Cleaning up temporary files")
             os.unlink(tmp_file_path)
-            os.unlink(wav_path)
-            for chunk in chunks:
-                os.unlink(chunk)
+            shutil.rmtree(chunk_dir, ignore_errors=True)
             logger.info("Temporary files cleaned up successfully")
             logger.info("Audio processing completed successfully")
 
@@ -139,13 +148,8 @@ def process_input():
     if st.session_state.user_input and st.session_state.user_input.strip():
         user_question = st.session_state.user_input
         st.session_state.chat_history.append({"role": "user", "content": user_question})
-        
-        with st.spinner('Generating response...'):
-            response = st.session_state.analyzer.chat_with_context(
-                st.session_state.transcription,
-                user_question
-            )
-            st.session_state.chat_history.append({"role": "assistant", "content": response})
+        # The answer is streamed into the chat tab on the rerun that follows
+        st.session_state.pending_question = user_question
         
         # Set active tab to Chat only when a message is sent
         st.session_state.active_tab = "💭 Chat"
@@ -167,7 +171,20 @@ with st.container():
 
 # Process audio only if a new file is uploaded and transcription hasn't been done yet
 if uploaded_file and st.session_state.transcription is None:
-    process_audio(uploaded_file)
+    # Content hash of the upload, the stable key for everything derived from it
+    st.session_state.file_hash = bytes_sha256(uploaded_file.getvalue())
+    logger.info(f"Uploaded file hash: {st.session_state.file_hash}")
+    
+    processed = load_processed_file(st.session_state.file_hash)
+    # An entry may hold only a summary if saving the transcriptions failed, so require them
+    if processed and "chunk_transcriptions" in processed:
+        # This exact file was processed before, so reuse its stored results
+        logger.info("Loading stored results for previously processed file")
+        st.session_state.chunk_transcriptions = processed["chunk_transcriptions"]
+        st.session_state.transcription = " ".join(processed["chunk_transcriptions"])
+        st.session_state.summary = processed.get("summary")
+    else:
+        process_audio(uploaded_file, st.session_state.file_hash)
 
 # Display results in tabs
 if st.session_state.transcription:
@@ -193,11 +210,18 @@ if st.session_state.transcription:
         st.markdown(st.session_state.transcription)
     
     elif active_tab == "📋 Summary":
-        if st.session_state.summary:
-            st.markdown("""
-                ### Key Points and Summary
-                ---
-            """)
+        st.markdown("""
+            ### Key Points and Summary
+            ---
+        """)
+        if st.session_state.summary is None:
+            logger.info("Starting summary generation")
+            st.session_state.summary = st.write_stream(
+                st.session_state.analyzer.generate_summary(st.session_state.chunk_transcriptions)
+            )
+            save_processed_file(st.session_state.file_hash, summary=st.session_state.summary)
+            logger.info("Summary generated successfully")
+        else:
             st.markdown(st.session_state.summary)
     
     elif active_tab == "💭 Chat":
@@ -219,6 +243,20 @@ if st.session_state.transcription:
                     </div>
                 """, unsafe_allow_html=True)
         
+        # Stream the answer to a newly asked question, then rerun to render it styled
+        if st.session_state.pending_question:
+            user_question = st.session_state.pending_question
+            st.session_state.pending_question = None
+            st.markdown("**Assistant:**")
+            response = st.write_stream(
+                st.session_state.analyzer.chat_with_context(
+                    st.session_state.transcription,
+                    user_question
+                )
+            )
+            st.session_state.chat_history.append({"role": "assistant", "content": response})
+            st.rerun()
+        
         # Move clear chat button and input to a container
         with st.container():
             col1, col2 = st.columns([4, 1])